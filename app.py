@@ -1,14 +1,16 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import pickle
-import plotly.express as px
-import plotly.graph_objects as go
 import os
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
+import time
+import training
+from model_zoo import load_serving_model, DEFAULT_LATENCY_BUDGET_MS
+from early_exit import EARLY_EXIT_ENABLED, make_anytime
+from charts import build_result_figures
+from prediction import (
+    CAREER_META, CLASS_NAMES, append_audit, build_features, predict_proba_cached, rank_careers,
+)
+from warmup import record_first_request, start_warmup
+from jobs import JOB_WORKERS, JobStore, start_workers
+from model_pool import ModelPool
 
 # ─── Page config ───
 st.set_page_config(
@@ -18,29 +20,6 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-# ─── Career metadata (icons + colors) ───
-CAREER_META = {
-    "Lawyer": {"icon": "⚖️", "color": "#6C5CE7"},
-    "Doctor": {"icon": "🩺", "color": "#00B894"},
-    "Government Officer": {"icon": "🏛️", "color": "#0984E3"},
-    "Artist": {"icon": "🎨", "color": "#E17055"},
-    "Unknown": {"icon": "❓", "color": "#636E72"},
-    "Software Engineer": {"icon": "💻", "color": "#6C5CE7"},
-    "Teacher": {"icon": "📚", "color": "#FDCB6E"},
-    "Business Owner": {"icon": "💼", "color": "#E84393"},
-    "Scientist": {"icon": "🔬", "color": "#00CEC9"},
-    "Banker": {"icon": "🏦", "color": "#2D3436"},
-    "Writer": {"icon": "✍️", "color": "#A29BFE"},
-    "Accountant": {"icon": "📊", "color": "#55EFC4"},
-    "Designer": {"icon": "🖌️", "color": "#FD79A8"},
-    "Construction Engineer": {"icon": "🏗️", "color": "#FAB1A0"},
-    "Game Developer": {"icon": "🎮", "color": "#74B9FF"},
-    "Stock Investor": {"icon": "📈", "color": "#00B894"},
-    "Real Estate Developer": {"icon": "🏠", "color": "#FFEAA7"},
-}
-
-CLASS_NAMES = list(CAREER_META.keys())
-
 # ─── Global CSS ───
 def inject_css():
     st.markdown("""
@@ -414,30 +393,51 @@ def train_and_save_model():
     """Auto-train the model if model_pipeline.pkl is missing."""
     if not os.path.exists(TRAIN_DATA_PATH):
         return None
-    train_data = pd.read_csv(TRAIN_DATA_PATH)
-    X = train_data.drop("target", axis=1)
-    y = train_data["target"]
-    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=42)
-    pipeline = Pipeline([
-        ("scaler", StandardScaler()),
-        ("clf", RandomForestClassifier(n_estimators=200, class_weight="balanced", random_state=42)),
-    ])
-    pipeline.fit(X_train, y_train)
-    with open(MODEL_PATH, "wb") as f:
-        pickle.dump(pipeline, f)
+    pipeline, _ = training.train_and_save_model(TRAIN_DATA_PATH, MODEL_PATH)
     return pipeline
 
 
 @st.cache_resource
 def load_model():
-    """Load model from disk, or auto-train if missing."""
-    if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, "rb") as f:
-            return pickle.load(f)
+    """Load the serving model, wrapped for early-exit inference if EARLY_EXIT=1."""
+    model = _load_pipeline()
+    if model is not None and EARLY_EXIT_ENABLED:
+        return make_anytime(model)
+    return model
+
+
+def _load_pipeline():
+    """Load the best zoo model within the latency budget, else model_pipeline.pkl.
+
+    Falls back to auto-training if neither exists.
+    """
+    model = load_serving_model(DEFAULT_LATENCY_BUDGET_MS, MODEL_PATH)
+    if model is not None:
+        return model
     # Auto-train on first run (e.g. Streamlit Cloud)
     return train_and_save_model()
 
 
+@st.cache_resource
+def get_model_pool():
+    """Process-wide pool of per-school models (``?school=<name>``)."""
+    return ModelPool(transform=make_anytime if EARLY_EXIT_ENABLED else None)
+
+
+def load_tenant_model(tenant):
+    """Load a school's own model from the pool, or None if it has none."""
+    try:
+        return get_model_pool().get(tenant)
+    except (ValueError, OSError):
+        return None
+
+
+@st.cache_resource
+def start_job_workers():
+    """Start the background bulk-scoring worker pool once per server process."""
+    return start_workers(JOB_WORKERS) if JOB_WORKERS > 0 else []
+
+
 # ─── Footer ───
 def render_footer():
     st.markdown(
@@ -455,6 +455,8 @@ if "page" not in st.session_state:
     st.session_state.page = "landing"
 
 inject_css()
+start_warmup(load_model, CLASS_NAMES, CAREER_META)
+start_job_workers()
 
 # ═══════════════════════════════════════════════════════════════
 #                       LANDING PAGE
@@ -506,6 +508,9 @@ if st.session_state.page == "landing":
         if st.button("🚀  Get Started", use_container_width=True):
             st.session_state.page = "predictor"
             st.rerun()
+        if st.button("📦  Bulk Scoring", use_container_width=True):
+            st.session_state.page = "jobs"
+            st.rerun()
 
     st.markdown("<br>", unsafe_allow_html=True)
 
@@ -570,13 +575,23 @@ elif st.session_state.page == "predictor":
         unsafe_allow_html=True,
     )
 
-    model = load_model()
+    tenant = st.query_params.get("school")
+    model = load_tenant_model(tenant) if tenant else load_model()
+    if model is None and tenant:
+        st.error(f"⚠️  No model has been trained for school `{tenant}`.")
+        st.stop()
     if model is None:
         st.error(
             "⚠️  Could not load or train the model. "
             "Make sure `train_data.csv` exists in the repo."
         )
         st.stop()
+    if tenant:
+        # Only this school's row; other tenants' names and traffic stay private
+        stats = get_model_pool().stats().get(tenant)
+        if stats:
+            with st.expander(f"📈 Model pool stats for `{tenant}`"):
+                st.dataframe([stats], hide_index=True)
 
     # ── Input form ──
     with st.form("predict_form"):
@@ -607,38 +622,20 @@ elif st.session_state.page == "predictor":
 
     # ── Prediction ──
     if submitted:
-        gender_enc = 1 if gender == "Female" else 0
-        part_time_enc = 1 if part_time == "Yes" else 0
-        extra_enc = 1 if extracurricular == "Yes" else 0
-        total_score = (
-            math_score + history_score + physics_score +
-            chemistry_score + biology_score + english_score + geography_score
-        )
+        request_start = time.perf_counter()
+        scores = [
+            math_score, history_score, physics_score, chemistry_score,
+            biology_score, english_score, geography_score,
+        ]
+        total_score = sum(scores)
         average_score = total_score / 7.0
 
-        feat_df = pd.DataFrame({
-            "gender": [gender_enc],
-            "part_time_job": [part_time_enc],
-            "absence_days": [absence],
-            "extracurricular_activities": [extra_enc],
-            "weekly_self_study_hours": [weekly_study],
-            "math_score": [math_score],
-            "history_score": [history_score],
-            "physics_score": [physics_score],
-            "chemistry_score": [chemistry_score],
-            "biology_score": [biology_score],
-            "english_score": [english_score],
-            "geography_score": [geography_score],
-            "total_score": [total_score],
-            "average_score": [average_score],
-        })
-
-        probs = model.predict_proba(feat_df)[0]
-        df_results = (
-            pd.DataFrame({"career": CLASS_NAMES, "probability": probs})
-            .sort_values("probability", ascending=False)
-            .reset_index(drop=True)
-        )
+        feat_df = build_features(gender, part_time, absence, extracurricular, weekly_study, scores)
+        append_audit(feat_df)
+
+        probs = predict_proba_cached(model, feat_df)
+        df_results = rank_careers(probs, CLASS_NAMES)
+        fig_bar, fig_radar, fig_donut, fig_sub = build_result_figures(df_results, scores, CAREER_META)
 
         # ── Separator ──
         st.markdown("---")
@@ -677,84 +674,12 @@ elif st.session_state.page == "predictor":
         tab1, tab2, tab3 = st.tabs(["📊 Bar Chart", "🕸️ Radar Chart", "🍩 Donut Chart"])
 
         with tab1:
-            top10 = df_results.head(10)
-            fig_bar = px.bar(
-                top10[::-1],
-                x="probability",
-                y="career",
-                orientation="h",
-                color="probability",
-                color_continuous_scale=["#1A1A2E", "#6C5CE7", "#FD79A8"],
-                text=top10[::-1]["probability"].apply(lambda x: f"{x:.1%}"),
-            )
-            fig_bar.update_layout(
-                plot_bgcolor="rgba(0,0,0,0)",
-                paper_bgcolor="rgba(0,0,0,0)",
-                font=dict(color="#B0B0C8", family="Inter"),
-                xaxis=dict(title="Probability", gridcolor="rgba(255,255,255,0.05)", tickformat=".0%"),
-                yaxis=dict(title=""),
-                coloraxis_showscale=False,
-                margin=dict(l=0, r=20, t=20, b=40),
-                height=420,
-            )
-            fig_bar.update_traces(
-                textposition="outside",
-                textfont=dict(color="#A29BFE", size=12),
-                marker_line_width=0,
-            )
             st.plotly_chart(fig_bar, use_container_width=True)
 
         with tab2:
-            top6 = df_results.head(6)
-            fig_radar = go.Figure()
-            fig_radar.add_trace(go.Scatterpolar(
-                r=top6["probability"].tolist() + [top6["probability"].iloc[0]],
-                theta=top6["career"].tolist() + [top6["career"].iloc[0]],
-                fill="toself",
-                fillcolor="rgba(108,92,231,0.2)",
-                line=dict(color="#6C5CE7", width=2),
-                marker=dict(size=6, color="#FD79A8"),
-                name="Probability",
-            ))
-            fig_radar.update_layout(
-                polar=dict(
-                    bgcolor="rgba(0,0,0,0)",
-                    radialaxis=dict(
-                        visible=True, gridcolor="rgba(255,255,255,0.08)",
-                        tickformat=".0%", color="#7F7F9A",
-                    ),
-                    angularaxis=dict(gridcolor="rgba(255,255,255,0.08)", color="#B0B0C8"),
-                ),
-                plot_bgcolor="rgba(0,0,0,0)",
-                paper_bgcolor="rgba(0,0,0,0)",
-                font=dict(color="#B0B0C8", family="Inter"),
-                showlegend=False,
-                margin=dict(l=60, r=60, t=40, b=40),
-                height=450,
-            )
             st.plotly_chart(fig_radar, use_container_width=True)
 
         with tab3:
-            top8 = df_results.head(8)
-            colors = [CAREER_META.get(c, {"color": "#6C5CE7"})["color"] for c in top8["career"]]
-            fig_donut = go.Figure(go.Pie(
-                labels=top8["career"],
-                values=top8["probability"],
-                hole=0.55,
-                marker=dict(colors=colors, line=dict(color="#0F0F1A", width=2)),
-                textinfo="label+percent",
-                textfont=dict(size=12, color="#FFFFFF"),
-                hovertemplate="<b>%{label}</b><br>Probability: %{percent}<extra></extra>",
-            ))
-            fig_donut.update_layout(
-                plot_bgcolor="rgba(0,0,0,0)",
-                paper_bgcolor="rgba(0,0,0,0)",
-                font=dict(color="#B0B0C8", family="Inter"),
-                showlegend=True,
-                legend=dict(font=dict(color="#B0B0C8")),
-                margin=dict(l=20, r=20, t=20, b=20),
-                height=420,
-            )
             st.plotly_chart(fig_donut, use_container_width=True)
 
         # ── Score summary metrics ──
@@ -772,30 +697,83 @@ elif st.session_state.page == "predictor":
 
         # ── Subject radar ──
         st.markdown('<div class="section-header">📐 Subject Profile</div>', unsafe_allow_html=True)
-        subjects = ["Math", "History", "Physics", "Chemistry", "Biology", "English", "Geography"]
-        scores = [math_score, history_score, physics_score, chemistry_score, biology_score, english_score, geography_score]
-        fig_sub = go.Figure()
-        fig_sub.add_trace(go.Scatterpolar(
-            r=scores + [scores[0]],
-            theta=subjects + [subjects[0]],
-            fill="toself",
-            fillcolor="rgba(253,121,168,0.15)",
-            line=dict(color="#FD79A8", width=2),
-            marker=dict(size=7, color="#A29BFE"),
-        ))
-        fig_sub.update_layout(
-            polar=dict(
-                bgcolor="rgba(0,0,0,0)",
-                radialaxis=dict(visible=True, range=[0, 100], gridcolor="rgba(255,255,255,0.08)", color="#7F7F9A"),
-                angularaxis=dict(gridcolor="rgba(255,255,255,0.08)", color="#B0B0C8"),
-            ),
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#B0B0C8", family="Inter"),
-            showlegend=False,
-            margin=dict(l=60, r=60, t=30, b=30),
-            height=380,
-        )
         st.plotly_chart(fig_sub, use_container_width=True)
+        record_first_request((time.perf_counter() - request_start) * 1000.0)
+
+    render_footer()
+
+
+# ═══════════════════════════════════════════════════════════════
+#                     BULK SCORING PAGE
+# ═══════════════════════════════════════════════════════════════
+elif st.session_state.page == "jobs":
+
+    # Back navigation
+    col_back, _ = st.columns([1, 5])
+    with col_back:
+        st.markdown('<div class="back-btn">', unsafe_allow_html=True)
+        if st.button("← Back"):
+            st.session_state.page = "landing"
+            st.rerun()
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    st.markdown(
+        """
+        <div style="text-align:center; margin-bottom:10px;" class="animate-in">
+            <span class="hero-badge">Background Jobs</span>
+            <h2 style="margin:8px 0 4px; font-size:2rem;">Bulk Scoring</h2>
+            <p class="section-sub">Upload a cohort CSV; it is scored in the background and survives closing this tab.</p>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    store = JobStore()
+
+    # ── Submission ──
+    with st.form("job_form", clear_on_submit=True):
+        uploaded = st.file_uploader(
+            "Cohort CSV (student-scores.csv or train_data.csv layout)", type=["csv"]
+        )
+        submitted = st.form_submit_button("📤  Submit Job", use_container_width=True)
+    if submitted and uploaded is not None:
+        try:
+            job_id = store.submit(uploaded, uploaded.name)
+            st.success(f"Queued job `{job_id}` ({uploaded.name}).")
+        except ValueError as exc:
+            st.error(f"⚠️  Could not queue {uploaded.name}: {exc}")
+
+    # ── Job list ──
+    st.markdown('<div class="section-header">📋 Jobs</div>', unsafe_allow_html=True)
+    if st.button("🔄  Refresh"):
+        st.rerun()
+
+    jobs = store.list_jobs()
+    if not jobs:
+        st.info("No jobs yet.")
+    for job in jobs:
+        done = job["rows_done"] / job["total_rows"] if job["total_rows"] else 1.0
+        st.markdown(
+            f"**{job['filename']}** · `{job['id']}` · {job['status']} · "
+            f"{job['rows_done']:,}/{job['total_rows']:,} rows"
+            + (f" · model `{job['model_version']}`" if job["model_version"] else "")
+        )
+        st.progress(min(done, 1.0))
+        if job["error"]:
+            st.error(job["error"])
+        if job["rows_done"]:
+            # Results are only assembled for the job the user asks for
+            results_key = f"results_{job['id']}"
+            partial = "" if job["status"] == "done" else " (partial)"
+            if st.button("📦  Prepare results" + partial, key=f"prepare_{job['id']}"):
+                st.session_state[results_key] = store.results(job["id"]).to_csv(index=False)
+            if results_key in st.session_state:
+                st.download_button(
+                    "⬇️  Download results" + partial,
+                    st.session_state[results_key],
+                    file_name=f"{os.path.splitext(job['filename'])[0]}_scored.csv",
+                    mime="text/csv",
+                    key=f"download_{job['id']}",
+                )
 
     render_footer()
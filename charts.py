@@ -0,0 +1,125 @@
+"""Plotly figures for the predictor results page."""
+import plotly.express as px
+import plotly.graph_objects as go
+
+SUBJECTS = ["Math", "History", "Physics", "Chemistry", "Biology", "English", "Geography"]
+
+
+def build_bar_chart(df_results):
+    top10 = df_results.head(10)
+    fig_bar = px.bar(
+        top10[::-1],
+        x="probability",
+        y="career",
+        orientation="h",
+        color="probability",
+        color_continuous_scale=["#1A1A2E", "#6C5CE7", "#FD79A8"],
+        text=top10[::-1]["probability"].apply(lambda x: f"{x:.1%}"),
+    )
+    fig_bar.update_layout(
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#B0B0C8", family="Inter"),
+        xaxis=dict(title="Probability", gridcolor="rgba(255,255,255,0.05)", tickformat=".0%"),
+        yaxis=dict(title=""),
+        coloraxis_showscale=False,
+        margin=dict(l=0, r=20, t=20, b=40),
+        height=420,
+    )
+    fig_bar.update_traces(
+        textposition="outside",
+        textfont=dict(color="#A29BFE", size=12),
+        marker_line_width=0,
+    )
+    return fig_bar
+
+
+def build_radar_chart(df_results):
+    top6 = df_results.head(6)
+    fig_radar = go.Figure()
+    fig_radar.add_trace(go.Scatterpolar(
+        r=top6["probability"].tolist() + [top6["probability"].iloc[0]],
+        theta=top6["career"].tolist() + [top6["career"].iloc[0]],
+        fill="toself",
+        fillcolor="rgba(108,92,231,0.2)",
+        line=dict(color="#6C5CE7", width=2),
+        marker=dict(size=6, color="#FD79A8"),
+        name="Probability",
+    ))
+    fig_radar.update_layout(
+        polar=dict(
+            bgcolor="rgba(0,0,0,0)",
+            radialaxis=dict(
+                visible=True, gridcolor="rgba(255,255,255,0.08)",
+                tickformat=".0%", color="#7F7F9A",
+            ),
+            angularaxis=dict(gridcolor="rgba(255,255,255,0.08)", color="#B0B0C8"),
+        ),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#B0B0C8", family="Inter"),
+        showlegend=False,
+        margin=dict(l=60, r=60, t=40, b=40),
+        height=450,
+    )
+    return fig_radar
+
+
+def build_donut_chart(df_results, career_meta):
+    top8 = df_results.head(8)
+    colors = [career_meta.get(c, {"color": "#6C5CE7"})["color"] for c in top8["career"]]
+    fig_donut = go.Figure(go.Pie(
+        labels=top8["career"],
+        values=top8["probability"],
+        hole=0.55,
+        marker=dict(colors=colors, line=dict(color="#0F0F1A", width=2)),
+        textinfo="label+percent",
+        textfont=dict(size=12, color="#FFFFFF"),
+        hovertemplate="<b>%{label}</b><br>Probability: %{percent}<extra></extra>",
+    ))
+    fig_donut.update_layout(
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#B0B0C8", family="Inter"),
+        showlegend=True,
+        legend=dict(font=dict(color="#B0B0C8")),
+        margin=dict(l=20, r=20, t=20, b=20),
+        height=420,
+    )
+    return fig_donut
+
+
+def build_subject_radar(scores):
+    fig_sub = go.Figure()
+    fig_sub.add_trace(go.Scatterpolar(
+        r=scores + [scores[0]],
+        theta=SUBJECTS + [SUBJECTS[0]],
+        fill="toself",
+        fillcolor="rgba(253,121,168,0.15)",
+        line=dict(color="#FD79A8", width=2),
+        marker=dict(size=7, color="#A29BFE"),
+    ))
+    fig_sub.update_layout(
+        polar=dict(
+            bgcolor="rgba(0,0,0,0)",
+            radialaxis=dict(visible=True, range=[0, 100], gridcolor="rgba(255,255,255,0.08)", color="#7F7F9A"),
+            angularaxis=dict(gridcolor="rgba(255,255,255,0.08)", color="#B0B0C8"),
+        ),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="#B0B0C8", family="Inter"),
+        showlegend=False,
+        margin=dict(l=60, r=60, t=30, b=30),
+        height=380,
+    )
+    return fig_sub
+
+
+def build_result_figures(df_results, scores, career_meta):
+    """All figures rendered for one prediction, in page order."""
+    return [
+        build_bar_chart(df_results),
+        build_radar_chart(df_results),
+        build_donut_chart(df_results, career_meta),
+        build_subject_radar(scores),
+    ]
@@ -0,0 +1,175 @@
+"""Anytime (early-exit) inference for the Random Forest pipeline.
+
+``AnytimeForest`` evaluates the forest's trees in blocks and stops for a row as
+soon as a confidence bound shows that its top-k ranking cannot change by more
+than ``tolerance`` if the remaining trees were evaluated. Trees of a fitted
+forest are exchangeable, so the first ``n`` trees are a random sample of the
+full forest; the bound is a normal-approximation interval on the paired vote
+differences of adjacent ranks, with a finite-population correction and a
+Bonferroni split of ``delta`` across the k gaps. Rows that never meet the
+bound (borderline cases) are scored by the full forest.
+"""
+import logging
+import os
+import time
+from statistics import NormalDist
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+EARLY_EXIT_ENABLED = os.environ.get("EARLY_EXIT", "0") == "1"
+EARLY_EXIT_TOP_K = int(os.environ.get("EARLY_EXIT_TOP_K", "5"))
+EARLY_EXIT_TOLERANCE = float(os.environ.get("EARLY_EXIT_TOLERANCE", "0.02"))
+EARLY_EXIT_DELTA = float(os.environ.get("EARLY_EXIT_DELTA", "0.05"))
+EARLY_EXIT_BLOCK_SIZE = int(os.environ.get("EARLY_EXIT_BLOCK_SIZE", "25"))
+EARLY_EXIT_MIN_TREES = int(os.environ.get("EARLY_EXIT_MIN_TREES", "50"))
+
+logger = logging.getLogger("early_exit")
+
+
+class AnytimeForest:
+    """Drop-in ``predict_proba`` / ``predict`` for a scaler + forest pipeline."""
+
+    def __init__(self, pipeline, top_k=EARLY_EXIT_TOP_K, tolerance=EARLY_EXIT_TOLERANCE,
+                 delta=EARLY_EXIT_DELTA, block_size=EARLY_EXIT_BLOCK_SIZE,
+                 min_trees=EARLY_EXIT_MIN_TREES):
+        self.pipeline = pipeline
+        self.forest = pipeline[-1]
+        self.classes_ = self.forest.classes_
+        self.top_k = min(top_k, len(self.classes_) - 1)
+        self.tolerance = tolerance
+        self.delta = delta
+        self.block_size = block_size
+        self.min_trees = min_trees
+        self._z = NormalDist().inv_cdf(1 - delta / (2 * self.top_k))
+
+    def _transform(self, X):
+        Xt = self.pipeline[:-1].transform(X) if len(self.pipeline) > 1 else X
+        return np.ascontiguousarray(Xt, dtype=np.float32)
+
+    def _settled(self, votes, n_total):
+        """Boolean mask of rows whose top-k ranking is settled by ``votes``.
+
+        ``votes`` has shape (trees evaluated, rows, classes).
+        """
+        n = votes.shape[0]
+        rows = np.arange(votes.shape[1])
+        means = votes.mean(axis=0)
+        order = np.argsort(-means, axis=1, kind="stable")[:, :self.top_k + 1]
+        fpc = np.sqrt((n_total - n) / (n_total - 1))
+        settled = np.ones(votes.shape[1], dtype=bool)
+        for j in range(self.top_k):
+            diff = votes[:, rows, order[:, j]] - votes[:, rows, order[:, j + 1]]
+            gap = diff.mean(axis=0)
+            # Floor the variance so unanimous early trees do not claim certainty
+            var = np.maximum(diff.var(axis=0, ddof=1), 1.0 / n)
+            bound = self._z * np.sqrt(var / n) * fpc
+            settled &= gap >= bound - self.tolerance
+        return settled
+
+    def predict_proba(self, X):
+        return self.predict_proba_with_counts(X)[0]
+
+    def predict_proba_with_counts(self, X):
+        """Return ``(probabilities, trees evaluated per row)``.
+
+        Nothing is stored on the instance, which is shared by all sessions.
+        """
+        Xt = self._transform(X)
+        trees = self.forest.estimators_
+        n_total, n_rows = len(trees), Xt.shape[0]
+        votes = np.zeros((n_total, n_rows, len(self.classes_)))
+        n_used = np.full(n_rows, n_total)
+        active = np.arange(n_rows)
+        done = 0
+        while done < n_total and active.size:
+            stop = min(done + self.block_size, n_total)
+            X_active = Xt[active]
+            for t in range(done, stop):
+                votes[t, active] = trees[t].predict_proba(X_active, check_input=False)
+            done = stop
+            if done < self.min_trees or done >= n_total:
+                continue
+            settled = self._settled(votes[:done, active], n_total)
+            n_used[active[settled]] = done
+            active = active[~settled]
+        totals = np.cumsum(votes, axis=0)[n_used - 1, np.arange(n_rows)]
+        return totals / n_used[:, None], n_used
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def make_anytime(model, **kwargs):
+    """Wrap ``model`` in ``AnytimeForest`` if it is a forest pipeline.
+
+    Other models (e.g. a gradient-boosting model picked from the zoo) are
+    returned unchanged with a warning, since early exit cannot apply to them.
+    """
+    if hasattr(model, "steps") and isinstance(model[-1], RandomForestClassifier):
+        return AnytimeForest(model, **kwargs)
+    final = model[-1] if hasattr(model, "steps") else model
+    logger.warning(
+        "EARLY_EXIT=1 ignored: served model is %s, not a RandomForestClassifier pipeline",
+        type(final).__name__,
+    )
+    return model
+
+
+def _single_row_p99_ms(model, X, rows=200):
+    timings = []
+    for i in range(rows):
+        row = X.iloc[[i % len(X)]]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.percentile(timings, 99))
+
+
+def evaluate_early_exit(pipeline, X, y, **kwargs):
+    """Compare anytime inference against the full forest on ``X`` / ``y``."""
+    anytime = AnytimeForest(pipeline, **kwargs)
+    k = anytime.top_k
+    full = pipeline.predict_proba(X)
+    fast, trees = anytime.predict_proba_with_counts(X)
+
+    full_top = np.argsort(-full, axis=1, kind="stable")[:, :k]
+    fast_top = np.argsort(-fast, axis=1, kind="stable")[:, :k]
+    # Largest amount by which a class ranked below an anytime top-k class beats
+    # it in the full forest; <= tolerance means the ranking is within tolerance
+    ranked = np.take_along_axis(full, np.argsort(-fast, axis=1, kind="stable"), axis=1)
+    below_max = np.maximum.accumulate(ranked[:, ::-1], axis=1)[:, ::-1]
+    violation = (below_max[:, 1:k + 1] - ranked[:, :k]).max(axis=1)
+
+    classes = pipeline.classes_
+    return {
+        "rows": len(X),
+        "top_k": k,
+        "mean_trees_evaluated": float(trees.mean()),
+        "full_forest_rows": float(np.mean(trees == len(pipeline[-1].estimators_))),
+        "top1_agreement": float(np.mean(full_top[:, 0] == fast_top[:, 0])),
+        "topk_set_agreement": float(np.mean(
+            [set(a) == set(b) for a, b in zip(full_top, fast_top)]
+        )),
+        "topk_order_agreement": float(np.mean(np.all(full_top == fast_top, axis=1))),
+        "topk_within_tolerance": float(np.mean(violation <= anytime.tolerance + 1e-12)),
+        "max_abs_proba_error": float(np.abs(full - fast).max()),
+        "full_accuracy": float(np.mean(classes[full_top[:, 0]] == np.asarray(y))),
+        "anytime_accuracy": float(np.mean(classes[fast_top[:, 0]] == np.asarray(y))),
+        "full_p99_latency_ms": _single_row_p99_ms(pipeline, X),
+        "anytime_p99_latency_ms": _single_row_p99_ms(anytime, X),
+    }
+
+
+if __name__ == "__main__":
+    import pickle
+
+    import pandas as pd
+
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(BASE_DIR, "model_pipeline.pkl"), "rb") as f:
+        pipeline = pickle.load(f)
+    test_data = pd.read_csv(os.path.join(BASE_DIR, "test_data.csv"))
+    report = evaluate_early_exit(pipeline, test_data.drop("target", axis=1), test_data["target"])
+    for key, value in report.items():
+        print(f"{key:<24}{value:.4f}" if isinstance(value, float) else f"{key:<24}{value}")
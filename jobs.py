@@ -0,0 +1,345 @@
+"""Background bulk-scoring jobs backed by a local SQLite store.
+
+Submitting a cohort CSV copies it into ``JOBS_DIR`` and inserts a ``queued``
+job. Worker processes claim jobs under a time-limited lease, score them
+``chunk_size`` rows at a time and commit each chunk's results together with
+the job's progress, so a job whose worker dies is re-claimed once its lease
+expires and resumes from the first unscored chunk. Each job records the
+version of the model scoring it; workers pick up a retrained model at their
+next job, and a job resumed under a different model is rescored from the
+start so its results never mix models. No external broker is needed; SQLite
+serialises the claims.
+
+Run standalone workers with ``python jobs.py --workers 4``; the Streamlit app
+also starts ``JOB_WORKERS`` of them in the background.
+"""
+import io
+import os
+import pickle
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import closing
+
+import pandas as pd
+
+from model_zoo import serving_path
+from prediction import encode_frame, score_frame
+from rescoring import model_version
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOBS_SCRIPT = os.path.abspath(__file__)
+JOBS_DB_PATH = os.environ.get("JOBS_DB_PATH", os.path.join(BASE_DIR, "jobs.db"))
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(BASE_DIR, "jobs"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_CHUNK_SIZE = int(os.environ.get("JOB_CHUNK_SIZE", "5000"))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+POLL_SECONDS = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total_rows INTEGER NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    error TEXT,
+    model_version TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_chunks (
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    chunk_index INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    result_csv TEXT NOT NULL,
+    PRIMARY KEY (job_id, chunk_index)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at);
+"""
+
+
+class JobStore:
+    """SQLite-backed job and checkpoint store; safe to share between processes."""
+
+    def __init__(self, db_path=JOBS_DB_PATH, jobs_dir=JOBS_DIR):
+        self.db_path = db_path
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+            if "model_version" not in columns:  # stores created before it was recorded
+                conn.execute("ALTER TABLE jobs ADD COLUMN model_version TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    # ─── Submission / status ───
+    def submit(self, fileobj, filename, chunk_size=JOB_CHUNK_SIZE):
+        """Store an uploaded CSV and queue it; returns the job id.
+
+        Raises ``ValueError`` if the header lacks the columns the model needs
+        or the file has no data rows.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        input_path = os.path.join(self.jobs_dir, f"{job_id}.csv")
+        with open(input_path, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+        try:
+            encode_frame(pd.read_csv(input_path, nrows=1))
+        except ValueError:
+            os.remove(input_path)
+            raise
+        # Count rows the way the workers will read them (pandas skips blank lines)
+        total_rows = sum(
+            len(c) for c in pd.read_csv(input_path, usecols=[0], chunksize=max(chunk_size, 100_000))
+        )
+        if total_rows == 0:
+            os.remove(input_path)
+            raise ValueError("The file has no data rows")
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, filename, input_path, status, total_rows, chunk_size,"
+                " created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, filename, input_path, total_rows, chunk_size, now, now),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, limit=50):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def results(self, job_id):
+        """Concatenate the checkpointed result chunks of a job (may be partial)."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT result_csv FROM job_chunks WHERE job_id = ? ORDER BY chunk_index",
+                (job_id,),
+            ).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        return pd.concat([pd.read_csv(io.StringIO(r["result_csv"])) for r in rows], ignore_index=True)
+
+    # ─── Worker side ───
+    def claim(self, worker, lease_seconds=JOB_LEASE_SECONDS):
+        """Atomically lease the oldest queued or abandoned job, or return ``None``."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued'"
+                " OR (status = 'running' AND lease_expires < ?)"
+                " ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row["attempts"] >= JOB_MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                    (row["error"] or "worker lost too many times", now, row["id"]),
+                )
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_expires = ?,"
+                " attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker, now + lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            job = dict(row)
+            job.update(status="running", worker=worker)
+            return job
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def begin(self, job_id, worker, version):
+        """Record the model scoring a claimed job; return the chunk to resume from.
+
+        A job last scored by another model version is reset to chunk 0.
+        Returns ``None`` if the lease was lost.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT chunks_done, model_version FROM jobs WHERE id = ? AND worker = ?",
+                (job_id, worker),
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            if row["model_version"] not in (None, version):
+                conn.execute("DELETE FROM job_chunks WHERE job_id = ?", (job_id,))
+                conn.execute("UPDATE jobs SET chunks_done = 0, rows_done = 0 WHERE id = ?", (job_id,))
+                row = {"chunks_done": 0}
+            conn.execute(
+                "UPDATE jobs SET model_version = ?, updated_at = ? WHERE id = ?",
+                (version, time.time(), job_id),
+            )
+            conn.execute("COMMIT")
+            return row["chunks_done"]
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def checkpoint(self, job_id, worker, chunk_index, result, lease_seconds=JOB_LEASE_SECONDS):
+        """Commit one chunk's results and progress; returns False if the lease was lost."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                "UPDATE jobs SET chunks_done = ?, rows_done = rows_done + ?, lease_expires = ?,"
+                " updated_at = ? WHERE id = ? AND worker = ? AND chunks_done = ?",
+                (chunk_index + 1, len(result), now + lease_seconds, now, job_id, worker, chunk_index),
+            )
+            if cur.rowcount != 1:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO job_chunks (job_id, chunk_index, rows, result_csv)"
+                " VALUES (?, ?, ?, ?)",
+                (job_id, chunk_index, len(result), result.to_csv(index=False)),
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def finish(self, job_id, worker, status, error=None):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires = NULL, updated_at = ?"
+                " WHERE id = ? AND worker = ?",
+                (status, error, time.time(), job_id, worker),
+            )
+
+
+def iter_chunks(path, chunk_size, start_chunk=0):
+    """Yield ``(chunk_index, frame)`` from ``start_chunk`` on, parsing the file once."""
+    for chunk_index, chunk in enumerate(pd.read_csv(path, chunksize=chunk_size)):
+        if chunk_index >= start_chunk:
+            yield chunk_index, chunk
+
+
+def process_job(store, model, job, worker, version):
+    """Score a claimed job from its first unscored chunk to the end."""
+    start_chunk = store.begin(job["id"], worker, version)
+    if start_chunk is None:
+        return
+    for chunk_index, chunk in iter_chunks(job["input_path"], job["chunk_size"], start_chunk):
+        result = score_frame(model, chunk)
+        # Data row number in the uploaded file (blank lines excluded)
+        result.insert(0, "row", chunk.index)
+        if not store.checkpoint(job["id"], worker, chunk_index, result):
+            return  # lease expired and another worker took over
+    store.finish(job["id"], worker, "done")
+
+
+class ServingModel:
+    """The currently served model, reloaded when its artifact changes."""
+
+    def __init__(self):
+        self._key = None
+        self.model = self.version = None
+
+    def refresh(self):
+        path = serving_path()
+        if path is None:
+            raise RuntimeError("no trained model available")
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key != self._key:
+            with open(path, "rb") as f:
+                self.model = pickle.load(f)
+            self.version = model_version(self.model)
+            self._key = key
+        return self.model, self.version
+
+
+def run_worker(db_path=JOBS_DB_PATH, jobs_dir=JOBS_DIR, poll_seconds=POLL_SECONDS, parent=None):
+    """Worker process main loop: claim, score, repeat until process ``parent`` exits."""
+    store = JobStore(db_path, jobs_dir)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    parent = os.getppid() if parent is None else parent
+    serving = ServingModel()
+    while os.getppid() == parent:
+        job = store.claim(worker)
+        if job is None:
+            time.sleep(poll_seconds)
+            continue
+        try:
+            model, version = serving.refresh()
+            process_job(store, model, job, worker, version)
+        except Exception as exc:
+            store.finish(job["id"], worker, "failed", repr(exc))
+
+
+def start_workers(n=JOB_WORKERS, db_path=JOBS_DB_PATH, jobs_dir=JOBS_DIR):
+    """Start ``n`` worker processes; returns their ``Popen`` handles.
+
+    Each worker is a fresh interpreter running ``jobs.py --worker``. Forking
+    the parent (e.g. the Streamlit server) deadlocks once it has run
+    OpenMP-backed ``predict_proba``, and multiprocessing's spawn would
+    re-execute the parent's main script (``app.py`` under Streamlit) in every
+    worker. Workers exit once their parent is gone.
+    """
+    JobStore(db_path, jobs_dir)  # create the schema before workers race for it
+    # The parent pid is passed explicitly: it may exit before a worker finishes importing
+    command = [
+        sys.executable, JOBS_SCRIPT, "--worker", "--parent", str(os.getpid()),
+        "--db", db_path, "--jobs-dir", jobs_dir,
+    ]
+    return [subprocess.Popen(command) for _ in range(n)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run bulk-scoring workers.")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    parser.add_argument("--worker", action="store_true", help="run a single worker in this process")
+    parser.add_argument("--parent", type=int, help="exit when this process does (default: parent)")
+    parser.add_argument("--db", default=JOBS_DB_PATH)
+    parser.add_argument("--jobs-dir", default=JOBS_DIR)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args.db, args.jobs_dir, parent=args.parent)
+    else:
+        for proc in start_workers(args.workers, args.db, args.jobs_dir):
+            proc.wait()
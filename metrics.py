@@ -0,0 +1,35 @@
+"""Process-wide metrics recorder.
+
+Every sample is kept in memory (for ``snapshot()``) and appended as a JSON line
+to ``METRICS_PATH`` so timings survive restarts and can be compared across
+deploys.
+"""
+import json
+import os
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_PATH = os.environ.get("METRICS_PATH", os.path.join(BASE_DIR, "metrics.jsonl"))
+
+_lock = threading.Lock()
+_samples = []
+
+
+def record(name, value, **labels):
+    """Record one sample of metric ``name`` with optional labels."""
+    sample = {"ts": time.time(), "name": name, "value": value, "labels": labels}
+    with _lock:
+        _samples.append(sample)
+        try:
+            with open(METRICS_PATH, "a") as f:
+                f.write(json.dumps(sample) + "\n")
+        except OSError:
+            pass  # metrics must never break serving
+    return sample
+
+
+def snapshot(name=None):
+    """Return recorded samples from this process, optionally filtered by name."""
+    with _lock:
+        return [s for s in _samples if name is None or s["name"] == name]
@@ -0,0 +1,222 @@
+"""Per-tenant (per-school) model pool with LRU eviction.
+
+Each tenant's model is a standard pipeline pickle at
+``TENANT_MODELS_DIR/<tenant>/model_pipeline.pkl``. ``ModelPool`` loads models on
+demand and keeps at most ``max_models`` of them, or ``max_bytes`` of pickle
+size, resident, evicting the least recently used. Concurrent first requests
+for the same tenant wait on a single load. Hit rates and load times are
+tracked per tenant, recorded in ``metrics`` on every load and shown to each
+school on its own predictor page.
+"""
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TENANT_MODELS_DIR = os.environ.get("TENANT_MODELS_DIR", os.path.join(BASE_DIR, "models", "tenants"))
+POOL_MAX_MODELS = int(os.environ.get("POOL_MAX_MODELS", "4"))
+POOL_MAX_BYTES = int(os.environ.get("POOL_MAX_BYTES", str(1024 ** 3)))
+
+_TENANT_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def tenant_model_path(tenant, models_dir=TENANT_MODELS_DIR):
+    """Artifact path for ``tenant``; raises ``ValueError`` for unsafe names."""
+    if not _TENANT_RE.match(tenant):
+        raise ValueError(f"Invalid tenant name: {tenant!r}")
+    return os.path.join(models_dir, tenant, "model_pipeline.pkl")
+
+
+def list_tenants(models_dir=TENANT_MODELS_DIR):
+    if not os.path.isdir(models_dir):
+        return []
+    return sorted(
+        t for t in os.listdir(models_dir)
+        if _TENANT_RE.match(t) and os.path.exists(tenant_model_path(t, models_dir))
+    )
+
+
+def save_tenant_model(tenant, model, models_dir=TENANT_MODELS_DIR):
+    path = tenant_model_path(tenant, models_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return path
+
+
+class _Entry:
+    __slots__ = ("model", "size")
+
+    def __init__(self, model, size):
+        self.model = model
+        self.size = size
+
+
+class _Load:
+    """An in-flight load shared by the leader and its waiters."""
+    __slots__ = ("done", "model", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.model = None
+        self.error = None
+        self.waiters = 0
+
+
+class ModelPool:
+    """Thread-safe LRU cache of tenant models bounded by count and bytes."""
+
+    def __init__(self, max_models=POOL_MAX_MODELS, max_bytes=POOL_MAX_BYTES,
+                 models_dir=TENANT_MODELS_DIR, loader=None, transform=None):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.models_dir = models_dir
+        self._loader = loader or self._load_pickle
+        self._transform = transform
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._bytes = 0
+        self._stats = {}
+
+    def _load_pickle(self, tenant):
+        path = tenant_model_path(tenant, self.models_dir)
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+        return model, os.path.getsize(path)
+
+    def _tenant_stats(self, tenant):
+        return self._stats.setdefault(
+            tenant, {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+        )
+
+    def get(self, tenant):
+        """Return ``tenant``'s model, loading it (once) if it is not resident.
+
+        Concurrent callers for the same tenant share one load and receive its
+        result or its exception. Stats are only kept for tenants that loaded
+        successfully, so unknown names cannot grow them.
+        """
+        with self._lock:
+            entry = self._entries.get(tenant)
+            if entry is not None:
+                self._entries.move_to_end(tenant)
+                self._stats[tenant]["hits"] += 1
+                return entry.model
+            load = self._loading.get(tenant)
+            leader = load is None
+            if leader:
+                load = self._loading[tenant] = _Load()
+            else:
+                load.waiters += 1
+
+        if not leader:
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.model
+
+        try:
+            start = time.perf_counter()
+            model, size = self._loader(tenant)
+            if self._transform is not None:
+                model = self._transform(model)
+            elapsed = time.perf_counter() - start
+        except Exception as exc:
+            load.error = exc
+            raise
+        else:
+            load.model = model
+            with self._lock:
+                stats = self._tenant_stats(tenant)
+                stats["misses"] += 1 + load.waiters
+                stats["loads"] += 1
+                stats["load_seconds"] += elapsed
+                self._entries[tenant] = _Entry(model, size)
+                self._bytes += size
+                self._evict()
+                snapshot = self._report(tenant)
+            metrics.record("tenant_model_load_seconds", elapsed, tenant=tenant, bytes=size)
+            metrics.record("tenant_pool_hit_rate", snapshot["hit_rate"], tenant=tenant,
+                           mean_load_seconds=snapshot["mean_load_seconds"])
+            return model
+        finally:
+            with self._lock:
+                del self._loading[tenant]
+            load.done.set()
+
+    def _evict(self):
+        # Always keep the most recently used model, even if it alone is over budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models or self._bytes > self.max_bytes
+        ):
+            tenant, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._tenant_stats(tenant)["evictions"] += 1
+
+    def invalidate(self, tenant):
+        """Drop ``tenant``'s resident model, e.g. after retraining it."""
+        with self._lock:
+            entry = self._entries.pop(tenant, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def resident(self):
+        with self._lock:
+            return list(self._entries)
+
+    def _report(self, tenant):
+        s = self._stats[tenant]
+        requests = s["hits"] + s["misses"]
+        return dict(
+            s,
+            hit_rate=s["hits"] / requests if requests else 0.0,
+            mean_load_seconds=s["load_seconds"] / s["loads"] if s["loads"] else 0.0,
+            resident=tenant in self._entries,
+        )
+
+    def stats(self):
+        """Per-tenant hits, misses, loads, evictions, hit rate and mean load time."""
+        with self._lock:
+            return {tenant: self._report(tenant) for tenant in self._stats}
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    from prediction import CLASS_NAMES, encode_frame
+    from training import fit_pipeline
+
+    parser = argparse.ArgumentParser(description="Train a per-school model.")
+    parser.add_argument("tenant", help="school / tenant name")
+    parser.add_argument("data", help="cohort CSV with a target (0-16) or career_aspiration column")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores for tree building (-1 = all)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    data = pd.read_csv(args.data)
+    if "target" in data.columns:
+        labels = data["target"]
+        unknown = labels[~labels.isin(range(len(CLASS_NAMES)))]
+    elif "career_aspiration" in data.columns:
+        labels = data["career_aspiration"]
+        unknown = labels[~labels.isin(CLASS_NAMES)]
+    else:
+        parser.error("the CSV needs a target or career_aspiration column")
+    if len(unknown):
+        parser.error(f"unknown careers in {args.data}: {', '.join(sorted(unknown.astype(str).unique()))}")
+    y = labels if "target" in data.columns else labels.map(CLASS_NAMES.index)
+    X = encode_frame(data)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    pipeline = fit_pipeline(X_train, y_train, args.n_jobs, labels={"tenant": args.tenant})
+    print(f"Test accuracy: {pipeline.score(X_test, y_test):.4f}")
+    print(f"Saved {save_tenant_model(args.tenant, pipeline)}")
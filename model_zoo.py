@@ -0,0 +1,290 @@
+"""Candidate model families and latency-aware model selection.
+
+Training fits every candidate in ``CANDIDATES`` on the same data, saves each as
+a ``StandardScaler`` + classifier pipeline pickle (the same artifact format as
+``model_pipeline.pkl``) and records its measured latency, throughput and
+accuracy in a JSON manifest. Forest candidates are benchmarked a second time
+behind ``early_exit.AnytimeForest`` as an ``early_exit`` entry sharing the same
+pickle. ``select_model()`` reads that manifest and returns the most accurate
+candidate that fits a latency budget.
+"""
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from early_exit import EARLY_EXIT_ENABLED, AnytimeForest
+
+# ─── Paths ───
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ZOO_DIR = os.path.join(BASE_DIR, "models")
+MANIFEST_PATH = os.path.join(ZOO_DIR, "zoo.json")
+TRAIN_DATA_PATH = os.path.join(BASE_DIR, "train_data.csv")
+TEST_DATA_PATH = os.path.join(BASE_DIR, "test_data.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "model_pipeline.pkl")
+
+# p99 single-row latency budget (milliseconds) used by ``select_model()``
+DEFAULT_LATENCY_BUDGET_MS = float(os.environ.get("LATENCY_BUDGET_MS", "50"))
+# Never serve a candidate this much less accurate than the best one in the zoo
+MAX_ACCURACY_DROP = float(os.environ.get("ZOO_MAX_ACCURACY_DROP", "0.05"))
+
+LATENCY_RUNS = 200
+# Latency is the median of this many independent runs, so one noisy run does
+# not flip which family fits the budget
+LATENCY_REPEATS = 5
+THROUGHPUT_RUNS = 3
+
+
+# ─── Candidates ───
+def _random_forest():
+    return RandomForestClassifier(n_estimators=200, class_weight="balanced", random_state=42)
+
+
+def _hist_gradient_boosting():
+    return HistGradientBoostingClassifier(max_iter=200, class_weight="balanced", random_state=42)
+
+
+def _logistic_regression():
+    return LogisticRegression(max_iter=2000, class_weight="balanced")
+
+
+CANDIDATES = {
+    "random_forest": _random_forest,
+    "hist_gradient_boosting": _hist_gradient_boosting,
+    "logistic_regression": _logistic_regression,
+}
+
+
+def build_pipeline(name):
+    """Return an unfitted scaler + classifier pipeline for candidate ``name``."""
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("clf", CANDIDATES[name]()),
+    ])
+
+
+# ─── Benchmarks ───
+def measure_latency(model, X, runs=LATENCY_RUNS, repeats=LATENCY_REPEATS):
+    """Return the p50/p99 single-row ``predict_proba`` latency in milliseconds.
+
+    Each percentile is the median over ``repeats`` runs of ``runs`` rows.
+    """
+    rows = [X.iloc[[i % len(X)]] for i in range(runs)]
+    model.predict_proba(rows[0])  # first call pays one-off initialisation
+    p50, p99 = [], []
+    for _ in range(repeats):
+        timings = []
+        for row in rows:
+            start = time.perf_counter()
+            model.predict_proba(row)
+            timings.append((time.perf_counter() - start) * 1000.0)
+        p50.append(np.percentile(timings, 50))
+        p99.append(np.percentile(timings, 99))
+    return {
+        "p50_latency_ms": float(np.median(p50)),
+        "p99_latency_ms": float(np.median(p99)),
+    }
+
+
+def measure_throughput(model, X, runs=THROUGHPUT_RUNS):
+    """Return the best batch ``predict_proba`` throughput in rows per second."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        best = min(best, time.perf_counter() - start)
+    return len(X) / best
+
+
+def benchmark(model, X_test, y_test):
+    """Measure accuracy, latency and throughput of a fitted model on the test set."""
+    stats = {"accuracy": float(accuracy_score(y_test, model.predict(X_test)))}
+    stats.update(measure_latency(model, X_test))
+    stats["throughput_rows_per_s"] = float(measure_throughput(model, X_test))
+    return stats
+
+
+# ─── Artifacts ───
+def artifact_info_path(model_path):
+    """Sidecar JSON recording when the pickle at ``model_path`` was trained."""
+    return os.path.splitext(model_path)[0] + ".json"
+
+
+def save_artifact(model, path, **info):
+    """Pickle ``model`` to ``path`` and record its training time in the sidecar."""
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    with open(artifact_info_path(path), "w") as f:
+        json.dump({"trained_at": time.time(), **info}, f, indent=2)
+
+
+def trained_at(path):
+    """Training time recorded by ``save_artifact()``, or ``None`` if unknown."""
+    try:
+        with open(artifact_info_path(path)) as f:
+            return float(json.load(f)["trained_at"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+# ─── Training ───
+def load_test_data(path=TEST_DATA_PATH):
+    test_data = pd.read_csv(path)
+    return test_data.drop("target", axis=1), test_data["target"]
+
+
+def train_model_zoo(X_train, y_train, X_test=None, y_test=None, names=None, zoo_dir=ZOO_DIR):
+    """Fit, benchmark and save every candidate; return the written manifest.
+
+    The test set defaults to ``test_data.csv``.
+    """
+    if X_test is None:
+        X_test, y_test = load_test_data()
+    os.makedirs(zoo_dir, exist_ok=True)
+    entries = []
+    for name in names or CANDIDATES:
+        pipeline = build_pipeline(name)
+        parallel = isinstance(pipeline.named_steps["clf"], RandomForestClassifier)
+        if parallel:
+            pipeline.set_params(clf__n_jobs=-1)
+        start = time.perf_counter()
+        pipeline.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        if parallel:
+            # Benchmark and serve single rows without a thread pool
+            pipeline.set_params(clf__n_jobs=None)
+
+        path = os.path.join(zoo_dir, f"{name}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(pipeline, f)
+
+        entry = {"name": name, "path": os.path.basename(path), "fit_seconds": fit_seconds}
+        entry.update(benchmark(pipeline, X_test, y_test))
+        entries.append(entry)
+        if parallel:
+            anytime = dict(entry, name=f"{name}_anytime", early_exit=True)
+            anytime.update(benchmark(AnytimeForest(pipeline), X_test, y_test))
+            entries.append(anytime)
+
+    manifest = {"created_at": time.time(), "models": entries}
+    with open(os.path.join(zoo_dir, os.path.basename(MANIFEST_PATH)), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# ─── Selection ───
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def choose_entry(entries, latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS,
+                 max_accuracy_drop=MAX_ACCURACY_DROP, early_exit=EARLY_EXIT_ENABLED):
+    """Pick the most accurate entry within the latency budget.
+
+    Entries more than ``max_accuracy_drop`` below the best zoo accuracy are
+    never chosen, however fast they are. ``early_exit`` entries (served
+    through ``make_anytime()``) are only considered when ``early_exit`` is
+    set, and are then preferred over plain ones. Returns ``None`` if nothing
+    qualifies, so the caller falls back to ``model_pipeline.pkl``.
+    """
+    if not entries:
+        return None
+    floor = max(e["accuracy"] for e in entries) - max_accuracy_drop
+
+    def best(anytime):
+        within = [
+            e for e in entries
+            if e.get("early_exit", False) == anytime
+            and e["p99_latency_ms"] <= latency_budget_ms and e["accuracy"] >= floor
+        ]
+        return max(within, key=lambda e: (e["accuracy"], -e["p99_latency_ms"]), default=None)
+
+    return (early_exit and best(True)) or best(False)
+
+
+def select_model(latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS, manifest_path=MANIFEST_PATH):
+    """Load the zoo model chosen for ``latency_budget_ms``.
+
+    Returns ``(model, entry)``, or ``(None, None)`` if no zoo has been trained
+    or no candidate qualifies.
+    """
+    manifest = load_manifest(manifest_path)
+    entry = choose_entry(manifest["models"] if manifest else [], latency_budget_ms)
+    if entry is None:
+        return None, None
+    path = os.path.join(os.path.dirname(manifest_path), entry["path"])
+    if not os.path.exists(path):
+        return None, None
+    with open(path, "rb") as f:
+        return pickle.load(f), entry
+
+
+def serving_path(latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS, fallback_path=MODEL_PATH,
+                 manifest_path=MANIFEST_PATH):
+    """Path of the artifact to serve, or ``None`` if nothing has been trained.
+
+    The zoo's choice is served unless ``fallback_path`` (``model_pipeline.pkl``)
+    was trained after the zoo, e.g. by ``training.py`` without ``--zoo``,
+    out-of-core training or the app's auto-train; a stale zoo must not shadow a
+    newer model. Training times come from the zoo manifest and the fallback's
+    ``save_artifact()`` sidecar, not file mtimes, so copying or touching the
+    pickle changes nothing; a fallback without a sidecar counts as older.
+    """
+    manifest = load_manifest(manifest_path)
+    fallback_time = trained_at(fallback_path)
+    fallback_newer = os.path.exists(fallback_path) and (
+        manifest is None or (fallback_time is not None and fallback_time > manifest["created_at"])
+    )
+    if not fallback_newer:
+        entry = choose_entry(manifest["models"] if manifest else [], latency_budget_ms)
+        if entry is not None:
+            path = os.path.join(os.path.dirname(manifest_path), entry["path"])
+            if os.path.exists(path):
+                return path
+    return fallback_path if os.path.exists(fallback_path) else None
+
+
+def load_serving_model(latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS, fallback_path=MODEL_PATH,
+                       manifest_path=MANIFEST_PATH):
+    """Load the model chosen by ``serving_path()``, or ``None``."""
+    path = serving_path(latency_budget_ms, fallback_path, manifest_path)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def format_manifest(manifest):
+    lines = [f"{'model':<24}{'accuracy':>10}{'p99 ms':>10}{'rows/s':>12}"]
+    for e in manifest["models"]:
+        lines.append(
+            f"{e['name']:<24}{e['accuracy']:>10.4f}"
+            f"{e['p99_latency_ms']:>10.2f}{e['throughput_rows_per_s']:>12.0f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    from training import load_training_data
+
+    X_train, _, y_train, _ = load_training_data(TRAIN_DATA_PATH)
+
+    print("Training model zoo...")
+    manifest = train_model_zoo(X_train, y_train)
+    print(format_manifest(manifest))
+    _, chosen = select_model()
+    print(
+        f"Selected for a {DEFAULT_LATENCY_BUDGET_MS:g} ms p99 budget: "
+        + (chosen["name"] if chosen else "none qualifies, model_pipeline.pkl is served")
+    )
@@ -0,0 +1,130 @@
+"""Out-of-core training for datasets larger than memory.
+
+The training CSV is streamed from disk in chunks of ``chunk_size`` rows and
+never loaded whole:
+
+* the ``StandardScaler`` statistics are fitted incrementally with
+  ``partial_fit`` on every chunk of the first pass;
+* each of ``n_subsets`` tree subsets is fitted on a uniform reservoir sample
+  of at most ``chunk_size`` rows, drawn in its own streaming pass, with the
+  forest's usual bootstrap on top;
+* the subsets' trees are merged into one ``RandomForestClassifier``.
+
+Peak memory is therefore about one chunk plus one reservoir plus a few
+exemplar rows per class (which guarantee every subset sees every class, so
+the trees share one ``classes_`` and can be merged). The result is a standard
+scaler + forest pipeline. Run it with ``python training.py --out-of-core``,
+which saves it as ``model_pipeline.pkl``.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAIN_DATA_PATH = os.path.join(BASE_DIR, "train_data.csv")
+
+OOC_CHUNK_SIZE = int(os.environ.get("OOC_CHUNK_SIZE", "100000"))
+OOC_SUBSETS = 4
+OOC_TREES_PER_SUBSET = 50
+EXEMPLARS_PER_CLASS = 5
+
+
+class Reservoir:
+    """Uniform sample of at most ``size`` rows from a stream (Algorithm R)."""
+
+    def __init__(self, size, n_features, rng):
+        self.size = size
+        self.rng = rng
+        self.X = np.empty((size, n_features))
+        self.y = np.empty(size, dtype=np.int64)
+        self.seen = 0
+
+    def add(self, X, y):
+        n = len(X)
+        # Fill the free slots first
+        fill = min(max(self.size - self.seen, 0), n)
+        self.X[self.seen:self.seen + fill] = X[:fill]
+        self.y[self.seen:self.seen + fill] = y[:fill]
+        # Row with stream index i replaces a random slot with probability size / (i + 1)
+        positions = np.arange(self.seen + fill, self.seen + n)
+        slots = (self.rng.random(len(positions)) * (positions + 1)).astype(np.int64)
+        keep = slots < self.size
+        rows = np.arange(fill, n)[keep]
+        slots = slots[keep]
+        if len(slots):
+            # Later rows win when several rows draw the same slot
+            _, last = np.unique(slots[::-1], return_index=True)
+            last = len(slots) - 1 - last
+            self.X[slots[last]] = X[rows[last]]
+            self.y[slots[last]] = y[rows[last]]
+        self.seen += n
+
+    def sample(self):
+        n = min(self.seen, self.size)
+        return self.X[:n], self.y[:n]
+
+
+def iter_chunks(path, chunk_size, target):
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        yield chunk.drop(target, axis=1), chunk[target].to_numpy()
+
+
+def merge_forests(forests):
+    """Combine fitted forests with identical classes into one forest."""
+    merged = forests[0]
+    for forest in forests[1:]:
+        if not np.array_equal(forest.classes_, merged.classes_):
+            raise ValueError("Cannot merge forests fitted on different classes")
+        merged.estimators_ += forest.estimators_
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def train_out_of_core(path=TRAIN_DATA_PATH, chunk_size=OOC_CHUNK_SIZE, n_subsets=OOC_SUBSETS,
+                      trees_per_subset=OOC_TREES_PER_SUBSET, target="target", random_state=42,
+                      n_jobs=-1, log=print):
+    """Fit a scaler + Random Forest pipeline by streaming ``path`` in chunks."""
+    scaler = StandardScaler()
+    exemplars = {}
+    forests = []
+    for subset in range(n_subsets):
+        start = time.perf_counter()
+        rng = np.random.default_rng([random_state, subset])
+        reservoir = None
+        for X, y in iter_chunks(path, chunk_size, target):
+            if subset == 0:
+                scaler.partial_fit(X)
+                for label in np.unique(y):
+                    have = exemplars.setdefault(label, [])
+                    if len(have) < EXEMPLARS_PER_CLASS:
+                        have.extend(X.to_numpy()[y == label][:EXEMPLARS_PER_CLASS - len(have)])
+            if reservoir is None:
+                reservoir = Reservoir(chunk_size, X.shape[1], rng)
+            reservoir.add(X.to_numpy(dtype=np.float64), y)
+
+        X_sample, y_sample = reservoir.sample()
+        missing = sorted(set(exemplars) - set(np.unique(y_sample)))
+        if missing:
+            X_sample = np.vstack([X_sample] + [np.asarray(exemplars[c]) for c in missing])
+            y_sample = np.concatenate([y_sample] + [[c] * len(exemplars[c]) for c in missing])
+
+        forest = RandomForestClassifier(
+            n_estimators=trees_per_subset, class_weight="balanced",
+            random_state=random_state + subset, n_jobs=n_jobs,
+        )
+        # Same transform the pipeline applies at predict time
+        forest.fit(scaler.transform(pd.DataFrame(X_sample, columns=scaler.feature_names_in_)), y_sample)
+        forest.set_params(n_jobs=None)
+        forests.append(forest)
+        log(
+            f"Subset {subset + 1}/{n_subsets}: {trees_per_subset} trees on {len(y_sample)} of "
+            f"{reservoir.seen} rows in {time.perf_counter() - start:.1f}s"
+        )
+
+    return Pipeline([("scaler", scaler), ("clf", merge_forests(forests))])
+
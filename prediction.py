@@ -0,0 +1,224 @@
+"""Career labels, feature encoding, cached predictions and the audit log.
+
+Streamlit re-executes ``app.py`` on every interaction, so process-wide state
+(the prediction cache) lives here rather than in the script.
+"""
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIT_LOG_PATH = os.environ.get("AUDIT_LOG_PATH", os.path.join(BASE_DIR, "audit_log.jsonl"))
+AUDIT_LOG_MAX_BYTES = int(os.environ.get("AUDIT_LOG_MAX_BYTES", str(10 * 1024 ** 2)))
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "1024"))
+
+# ─── Career metadata (icons + colors) ───
+CAREER_META = {
+    "Lawyer": {"icon": "⚖️", "color": "#6C5CE7"},
+    "Doctor": {"icon": "🩺", "color": "#00B894"},
+    "Government Officer": {"icon": "🏛️", "color": "#0984E3"},
+    "Artist": {"icon": "🎨", "color": "#E17055"},
+    "Unknown": {"icon": "❓", "color": "#636E72"},
+    "Software Engineer": {"icon": "💻", "color": "#6C5CE7"},
+    "Teacher": {"icon": "📚", "color": "#FDCB6E"},
+    "Business Owner": {"icon": "💼", "color": "#E84393"},
+    "Scientist": {"icon": "🔬", "color": "#00CEC9"},
+    "Banker": {"icon": "🏦", "color": "#2D3436"},
+    "Writer": {"icon": "✍️", "color": "#A29BFE"},
+    "Accountant": {"icon": "📊", "color": "#55EFC4"},
+    "Designer": {"icon": "🖌️", "color": "#FD79A8"},
+    "Construction Engineer": {"icon": "🏗️", "color": "#FAB1A0"},
+    "Game Developer": {"icon": "🎮", "color": "#74B9FF"},
+    "Stock Investor": {"icon": "📈", "color": "#00B894"},
+    "Real Estate Developer": {"icon": "🏠", "color": "#FFEAA7"},
+}
+
+CLASS_NAMES = list(CAREER_META.keys())
+
+SUBJECT_COLUMNS = [
+    "math_score", "history_score", "physics_score", "chemistry_score",
+    "biology_score", "english_score", "geography_score",
+]
+
+FEATURE_COLUMNS = [
+    "gender", "part_time_job", "absence_days", "extracurricular_activities",
+    "weekly_self_study_hours",
+] + SUBJECT_COLUMNS + ["total_score", "average_score"]
+
+
+def build_features(gender, part_time, absence, extracurricular, weekly_study, scores):
+    """Encode predictor form inputs into a one-row feature DataFrame.
+
+    ``scores`` holds the seven subject scores in ``SUBJECT_COLUMNS`` order.
+    """
+    total_score = sum(scores)
+    row = {
+        "gender": 1 if gender == "Female" else 0,
+        "part_time_job": 1 if part_time == "Yes" else 0,
+        "absence_days": absence,
+        "extracurricular_activities": 1 if extracurricular == "Yes" else 0,
+        "weekly_self_study_hours": weekly_study,
+        **dict(zip(SUBJECT_COLUMNS, scores)),
+        "total_score": total_score,
+        "average_score": total_score / 7.0,
+    }
+    return pd.DataFrame([row], columns=FEATURE_COLUMNS)
+
+
+def _yes(series):
+    """Encode booleans / yes-no / 0-1 values as 0 or 1."""
+    if series.dtype == bool:
+        return series.astype(int)
+    return series.astype(str).str.strip().str.lower().isin(["true", "yes", "1"]).astype(int)
+
+
+def encode_frame(df):
+    """Return the 14 model features for a batch of students.
+
+    Accepts either already-encoded rows (``train_data.csv`` layout) or raw
+    records in the ``student-scores.csv`` layout; raises ``ValueError`` if
+    required columns are missing.
+    """
+    if all(c in df.columns for c in FEATURE_COLUMNS):
+        return df[FEATURE_COLUMNS]
+    raw_columns = FEATURE_COLUMNS[:-2]
+    missing = [c for c in raw_columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    features = pd.DataFrame(index=df.index)
+    features["gender"] = (df["gender"].astype(str).str.strip().str.lower() == "female").astype(int)
+    features["part_time_job"] = _yes(df["part_time_job"])
+    features["absence_days"] = df["absence_days"]
+    features["extracurricular_activities"] = _yes(df["extracurricular_activities"])
+    features["weekly_self_study_hours"] = df["weekly_self_study_hours"]
+    for c in SUBJECT_COLUMNS:
+        features[c] = df[c]
+    features["total_score"] = df[SUBJECT_COLUMNS].sum(axis=1)
+    features["average_score"] = features["total_score"] / 7.0
+    return features
+
+
+def score_frame(model, df, top_n=5):
+    """Batch-score raw or encoded rows; keep an ``id`` column if present."""
+    probs = full_proba(model, model.predict_proba(encode_frame(df)))
+    order = probs.argsort(axis=1)[:, ::-1][:, :top_n]
+    names = pd.Series(CLASS_NAMES)
+    result = pd.DataFrame(index=df.index)
+    if "id" in df.columns:
+        result["id"] = df["id"]
+    result["predicted_career"] = names[order[:, 0]].values
+    result["probability"] = probs[range(len(df)), order[:, 0]]
+    result[f"top_{top_n}"] = ["; ".join(names[row]) for row in order]
+    return result
+
+
+# ─── Prediction cache ───
+# One LRU per model object, dropped automatically when the model is garbage
+# collected (e.g. evicted from the tenant model pool)
+_cache_lock = threading.Lock()
+_caches = weakref.WeakKeyDictionary()
+
+
+def full_proba(model, probs):
+    """Expand ``predict_proba`` columns to all ``CLASS_NAMES``.
+
+    Models trained on a cohort that lacks some careers only output columns
+    for the classes they saw.
+    """
+    classes = getattr(model, "classes_", None)
+    if classes is None or len(classes) == len(CLASS_NAMES):
+        return probs
+    expanded = np.zeros(probs.shape[:-1] + (len(CLASS_NAMES),))
+    expanded[..., np.asarray(classes, dtype=int)] = probs
+    return expanded
+
+
+def predict_proba_cached(model, feat_df):
+    """``model.predict_proba`` for a single row, memoised per model and features."""
+    key = tuple(float(v) for v in feat_df.iloc[0])
+    with _cache_lock:
+        cache = _caches.setdefault(model, OrderedDict())
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    probs = full_proba(model, model.predict_proba(feat_df))[0]
+    with _cache_lock:
+        cache[key] = probs
+        while len(cache) > PREDICTION_CACHE_SIZE:
+            cache.popitem(last=False)
+    return probs
+
+
+def clear_prediction_cache():
+    with _cache_lock:
+        _caches.clear()
+
+
+# ─── Audit log ───
+def append_audit(feat_df, path=AUDIT_LOG_PATH, max_bytes=AUDIT_LOG_MAX_BYTES):
+    """Append the encoded features of a prediction request to the audit log.
+
+    Once the log reaches ``max_bytes`` it is rotated to ``<path>.1`` (one
+    generation is kept).
+    """
+    try:
+        if os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+            os.replace(path, path + ".1")
+        with open(path, "a") as f:
+            for row in feat_df.to_dict(orient="records"):
+                f.write(json.dumps(row) + "\n")
+    except OSError:
+        pass
+
+
+def _reverse_lines(path, block_size=64 * 1024):
+    """Yield the lines of ``path`` from last to first, reading from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + tail).split(b"\n")
+            tail = lines.pop(0)  # may be the end of a line in the previous block
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+def recent_audit_profiles(limit, path=AUDIT_LOG_PATH):
+    """Return up to ``limit`` of the most recent distinct audit-log feature rows."""
+    if limit <= 0 or not os.path.exists(path):
+        return []
+    profiles, seen = [], set()
+    for line in _reverse_lines(path):
+        try:
+            row = json.loads(line)
+        except ValueError:
+            continue
+        key = tuple(row.get(c) for c in FEATURE_COLUMNS)
+        if None in key or key in seen:
+            continue
+        seen.add(key)
+        profiles.append(pd.DataFrame([row], columns=FEATURE_COLUMNS))
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+
+def rank_careers(probs, class_names):
+    """Return careers sorted by descending probability."""
+    return (
+        pd.DataFrame({"career": class_names, "probability": probs})
+        .sort_values("probability", ascending=False)
+        .reset_index(drop=True)
+    )
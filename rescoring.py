@@ -0,0 +1,181 @@
+"""Delta re-scoring of a student roster.
+
+Predictions are stored in SQLite keyed by student ``id`` together with a
+fingerprint of the row's 14 encoded features. A re-scoring run hashes the
+incoming rows, skips those whose fingerprint is unchanged, batch-predicts only
+new or changed rows and upserts them, so its cost is proportional to the
+delta. The stored table is tied to one model version (a hash of the pickled
+model) and is cleared only when that version changes.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from prediction import encode_frame, score_frame
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PREDICTIONS_DB_PATH = os.environ.get("PREDICTIONS_DB_PATH", os.path.join(BASE_DIR, "predictions.db"))
+RESCORE_CHUNK_SIZE = int(os.environ.get("RESCORE_CHUNK_SIZE", "50000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    student_id TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    predicted_career TEXT NOT NULL,
+    probability REAL NOT NULL,
+    top_5 TEXT NOT NULL,
+    scored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def model_version(model):
+    """Stable identifier of a fitted model: a hash of its pickle."""
+    return hashlib.sha256(pickle.dumps(model, protocol=4)).hexdigest()[:16]
+
+
+def fingerprint_rows(features):
+    """Hex fingerprint per row of the encoded feature frame.
+
+    Values are cast to float64 first so int and float encodings of the same
+    row hash identically.
+    """
+    hashes = pd.util.hash_pandas_object(features.astype("float64"), index=False)
+    return hashes.map("{:016x}".format)
+
+
+class PredictionStore:
+    """SQLite table of the latest prediction per student for one model version."""
+
+    def __init__(self, db_path=PREDICTIONS_DB_PATH):
+        self.db_path = db_path
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def ensure_version(self, version):
+        """Clear stored predictions if they belong to another model version.
+
+        Returns True if the table was invalidated.
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'model_version'").fetchone()
+            if row is not None and row[0] == version:
+                return False
+            conn.execute("DELETE FROM predictions")
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('model_version', ?)", (version,)
+            )
+            return row is not None
+
+    def fingerprints(self, student_ids):
+        """Map each stored student id in ``student_ids`` to its fingerprint."""
+        found = {}
+        ids = list(student_ids)
+        with closing(self._connect()) as conn:
+            for i in range(0, len(ids), 900):  # stay under SQLite's variable limit
+                batch = ids[i:i + 900]
+                placeholders = ",".join("?" * len(batch))
+                found.update(conn.execute(
+                    f"SELECT student_id, fingerprint FROM predictions"
+                    f" WHERE student_id IN ({placeholders})",
+                    batch,
+                ))
+        return found
+
+    def upsert(self, scored, version):
+        now = time.time()
+        rows = [
+            (str(r.id), r.fingerprint, version, r.predicted_career, float(r.probability), r.top_5, now)
+            for r in scored.itertuples(index=False)
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO predictions (student_id, fingerprint, model_version,"
+                " predicted_career, probability, top_5, scored_at) VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(student_id) DO UPDATE SET fingerprint = excluded.fingerprint,"
+                " model_version = excluded.model_version,"
+                " predicted_career = excluded.predicted_career,"
+                " probability = excluded.probability, top_5 = excluded.top_5,"
+                " scored_at = excluded.scored_at",
+                rows,
+            )
+
+    def to_frame(self):
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query("SELECT * FROM predictions ORDER BY student_id", conn)
+
+
+def rescore_frame(store, model, roster, version):
+    """Score the new or changed rows of one roster chunk; returns (rows, scored)."""
+    if "id" not in roster.columns:
+        raise ValueError("Roster must have an id column")
+    roster = roster.drop_duplicates("id", keep="last")
+    fingerprints = fingerprint_rows(encode_frame(roster))
+    ids = roster["id"].astype(str)
+    stored = store.fingerprints(ids)
+    changed = [stored.get(sid) != fp for sid, fp in zip(ids, fingerprints)]
+    delta = roster[changed]
+    if len(delta):
+        scored = score_frame(model, delta)
+        scored["fingerprint"] = fingerprints[changed].values
+        store.upsert(scored, version)
+    return len(roster), len(delta)
+
+
+def rescore(roster_path, model, store=None, chunk_size=RESCORE_CHUNK_SIZE):
+    """Delta re-score a roster CSV; returns counts and elapsed time."""
+    store = store or PredictionStore()
+    version = model_version(model)
+    start = time.perf_counter()
+    invalidated = store.ensure_version(version)
+    total = scored = 0
+    for chunk in pd.read_csv(roster_path, chunksize=chunk_size):
+        rows, changed = rescore_frame(store, model, chunk, version)
+        total += rows
+        scored += changed
+    return {
+        "model_version": version,
+        "invalidated": invalidated,
+        "rows": total,
+        "scored": scored,
+        "unchanged": total - scored,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from model_zoo import load_serving_model
+
+    parser = argparse.ArgumentParser(description="Re-score only new or changed students.")
+    parser.add_argument("roster", help="roster CSV with an id column (student-scores.csv layout)")
+    parser.add_argument("--export", help="write all stored predictions to this CSV")
+    args = parser.parse_args()
+
+    model = load_serving_model()
+    if model is None:
+        raise SystemExit("No trained model found; run train_and_save_model.py first.")
+    store = PredictionStore()
+    report = rescore(args.roster, model, store)
+    print(
+        f"{report['rows']} rows: {report['scored']} scored, {report['unchanged']} unchanged"
+        f" in {report['seconds']:.2f}s (model {report['model_version']}"
+        f"{', cache invalidated' if report['invalidated'] else ''})"
+    )
+    if args.export:
+        store.to_frame().to_csv(args.export, index=False)
+        print(f"Exported predictions to {args.export}")
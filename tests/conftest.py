@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _metrics_path(tmp_path, monkeypatch):
+    """Keep test metrics out of the repo's metrics.jsonl."""
+    monkeypatch.setattr(metrics, "METRICS_PATH", str(tmp_path / "metrics.jsonl"))
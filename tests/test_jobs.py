@@ -0,0 +1,140 @@
+import io
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import jobs
+from jobs import JobStore, ServingModel, process_job
+from prediction import CLASS_NAMES, FEATURE_COLUMNS
+
+
+class FakeModel:
+    """Predicts class 1 for every row and counts the rows it scored."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        probs = np.zeros((len(X), len(CLASS_NAMES)))
+        probs[:, 1] = 1.0
+        return probs
+
+
+def cohort_csv(rows):
+    data = pd.DataFrame(np.arange(rows)[:, None].repeat(len(FEATURE_COLUMNS), axis=1),
+                        columns=FEATURE_COLUMNS)
+    return io.BytesIO(data.to_csv(index=False).encode())
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"), str(tmp_path / "jobs"))
+
+
+def test_submit_counts_rows_and_queues(store):
+    job_id = store.submit(cohort_csv(10), "cohort.csv", chunk_size=4)
+    job = store.get(job_id)
+    assert (job["status"], job["total_rows"], job["chunk_size"]) == ("queued", 10, 4)
+
+
+@pytest.mark.parametrize("upload", [
+    io.BytesIO(b"math_score,history_score\n1,2\n"),  # missing columns
+    io.BytesIO(",".join(FEATURE_COLUMNS).encode() + b"\n"),  # header only
+])
+def test_submit_rejects_unscorable_files(store, upload):
+    with pytest.raises(ValueError):
+        store.submit(upload, "bad.csv")
+    assert store.list_jobs() == []
+    assert not any(p.endswith(".csv") for p in os.listdir(store.jobs_dir))
+
+
+def test_process_job_scores_every_chunk(store):
+    job_id = store.submit(cohort_csv(10), "cohort.csv", chunk_size=4)
+    model = FakeModel()
+    process_job(store, model, store.claim("w1"), "w1", "v1")
+
+    job = store.get(job_id)
+    assert (job["status"], job["chunks_done"], job["rows_done"]) == ("done", 3, 10)
+    assert job["model_version"] == "v1"
+    results = store.results(job_id)
+    assert results["row"].tolist() == list(range(10))
+    assert set(results["predicted_career"]) == {CLASS_NAMES[1]}
+    assert model.rows == 10
+
+
+def test_expired_lease_resumes_from_next_chunk(store):
+    job_id = store.submit(cohort_csv(10), "cohort.csv", chunk_size=4)
+    job = store.claim("w1", lease_seconds=-1)  # w1 "dies" with an expired lease
+    assert store.begin(job_id, "w1", "v1") == 0
+    first = pd.DataFrame({"row": range(4)})
+    assert store.checkpoint(job_id, "w1", 0, first, lease_seconds=-1)
+
+    job = store.claim("w2")
+    assert job["id"] == job_id and job["chunks_done"] == 1
+    # The old worker can no longer commit once the job was re-claimed
+    assert not store.checkpoint(job_id, "w1", 1, first)
+
+    model = FakeModel()
+    process_job(store, model, job, "w2", "v1")
+    assert model.rows == 6
+    assert store.get(job_id)["status"] == "done"
+    assert store.results(job_id)["row"].tolist() == list(range(10))
+
+
+def test_checkpoint_rejects_out_of_order_chunk(store):
+    job_id = store.submit(cohort_csv(10), "cohort.csv", chunk_size=4)
+    store.claim("w1")
+    assert not store.checkpoint(job_id, "w1", 1, pd.DataFrame({"row": [4]}))
+    assert store.get(job_id)["chunks_done"] == 0
+
+
+def test_resume_under_new_model_rescores_from_start(store):
+    job_id = store.submit(cohort_csv(10), "cohort.csv", chunk_size=4)
+    store.claim("w1", lease_seconds=-1)
+    store.begin(job_id, "w1", "v1")
+    store.checkpoint(job_id, "w1", 0, pd.DataFrame({"row": range(4)}), lease_seconds=-1)
+
+    model = FakeModel()
+    process_job(store, model, store.claim("w2"), "w2", "v2")
+    job = store.get(job_id)
+    assert model.rows == 10
+    assert (job["model_version"], job["rows_done"]) == ("v2", 10)
+    assert store.results(job_id)["row"].tolist() == list(range(10))
+
+
+def test_job_fails_after_max_attempts(store):
+    job_id = store.submit(cohort_csv(3), "cohort.csv")
+    for _ in range(jobs.JOB_MAX_ATTEMPTS):
+        assert store.claim("w", lease_seconds=-1)["id"] == job_id
+    assert store.claim("w") is None
+    assert store.get(job_id)["status"] == "failed"
+
+
+def test_serving_model_reloads_changed_artifact(tmp_path, monkeypatch):
+    path = tmp_path / "model.pkl"
+    monkeypatch.setattr(jobs, "serving_path", lambda: str(path))
+    path.write_bytes(pickle.dumps({"trees": 1}))
+    serving = ServingModel()
+    model, version = serving.refresh()
+    assert serving.refresh() == (model, version)
+
+    path.write_bytes(pickle.dumps({"trees": 2, "retrained": True}))
+    model, new_version = serving.refresh()
+    assert model == {"trees": 2, "retrained": True} and new_version != version
+
+
+def test_serving_model_requires_a_trained_model(monkeypatch):
+    monkeypatch.setattr(jobs, "serving_path", lambda: None)
+    with pytest.raises(RuntimeError):
+        ServingModel().refresh()
+
+
+def test_worker_exits_once_its_parent_is_gone(store):
+    # A pid that is not our parent: the loop must stop before claiming anything
+    store.submit(cohort_csv(3), "cohort.csv")
+    jobs.run_worker(store.db_path, store.jobs_dir, poll_seconds=0, parent=-1)
+    assert store.list_jobs()[0]["status"] == "queued"
@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+import metrics
+from model_pool import ModelPool, save_tenant_model
+
+
+def sized_loader(sizes, calls):
+    def load(tenant):
+        calls.append(tenant)
+        return object(), sizes.get(tenant, 100)
+    return load
+
+
+def wait_for_waiters(pool, tenant, n, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with pool._lock:
+            load = pool._loading.get(tenant)
+            if load is not None and load.waiters == n:
+                return
+        time.sleep(0.005)
+    raise AssertionError(f"{n} waiters never arrived")
+
+
+def run_concurrently(pool, tenant, n):
+    results, errors = [], []
+
+    def get():
+        try:
+            results.append(pool.get(tenant))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=get) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def gated_loader(gate, calls, error=None):
+    def load(tenant):
+        calls.append(tenant)
+        gate.wait(5)
+        if error is not None:
+            raise error
+        return object(), 100
+    return load
+
+
+def test_concurrent_first_requests_share_one_load():
+    gate, calls = threading.Event(), []
+    pool = ModelPool(loader=gated_loader(gate, calls))
+    threads, results, errors = run_concurrently(pool, "north", 8)
+    wait_for_waiters(pool, "north", 7)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert calls == ["north"] and not errors
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    stats = pool.stats()["north"]
+    assert (stats["loads"], stats["misses"], stats["hits"]) == (1, 8, 0)
+
+
+def test_failed_load_is_raised_to_every_waiter_without_stats():
+    gate, calls = threading.Event(), []
+    pool = ModelPool(loader=gated_loader(gate, calls, FileNotFoundError("missing")))
+    threads, results, errors = run_concurrently(pool, "nope", 4)
+    wait_for_waiters(pool, "nope", 3)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert calls == ["nope"] and not results
+    assert len(errors) == 4 and all(isinstance(e, FileNotFoundError) for e in errors)
+    assert pool.stats() == {} and pool.resident() == []
+
+
+def test_failed_load_is_retried_by_the_next_request():
+    calls = []
+    outcomes = [OSError("transient"), (object(), 100)]
+
+    def load(tenant):
+        calls.append(tenant)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    pool = ModelPool(loader=load)
+    with pytest.raises(OSError):
+        pool.get("north")
+    pool.get("north")
+    assert calls == ["north", "north"] and pool.resident() == ["north"]
+
+
+def test_lru_eviction_by_count():
+    calls = []
+    pool = ModelPool(max_models=2, loader=sized_loader({}, calls))
+    for tenant in ["a", "b", "a", "c"]:
+        pool.get(tenant)
+    assert pool.resident() == ["a", "c"]
+    assert pool.stats()["b"]["evictions"] == 1
+    pool.get("b")
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_byte_accounting_and_eviction():
+    pool = ModelPool(max_models=10, max_bytes=250, loader=sized_loader({}, []))
+    for tenant in ["a", "b", "c"]:
+        pool.get(tenant)
+    assert pool.resident() == ["b", "c"] and pool._bytes == 200
+    pool.invalidate("b")
+    assert pool.resident() == ["c"] and pool._bytes == 100
+
+
+def test_most_recent_model_is_kept_even_over_budget():
+    pool = ModelPool(max_bytes=250, loader=sized_loader({"big": 1000}, []))
+    pool.get("a")
+    pool.get("big")
+    assert pool.resident() == ["big"] and pool._bytes == 1000
+
+
+def test_pickle_loader_and_unsafe_tenant_names(tmp_path):
+    save_tenant_model("north", {"model": "north"}, str(tmp_path))
+    pool = ModelPool(models_dir=str(tmp_path))
+    assert pool.get("north") == {"model": "north"}
+    with pytest.raises(ValueError):
+        pool.get("../north")
+    with pytest.raises(FileNotFoundError):
+        pool.get("south")
+    assert list(pool.stats()) == ["north"]
+
+
+def test_loads_record_hit_rate_metrics():
+    pool = ModelPool(loader=sized_loader({}, []))
+    pool.get("north")
+    samples = metrics.snapshot("tenant_pool_hit_rate")
+    assert samples and samples[-1]["labels"]["tenant"] == "north"
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from out_of_core import Reservoir, merge_forests, train_out_of_core
+
+
+def stream(reservoir, n, chunk):
+    for start in range(0, n, chunk):
+        ids = np.arange(start, min(start + chunk, n))
+        reservoir.add(ids[:, None].astype(float), ids)
+
+
+def test_reservoir_keeps_a_short_stream_whole():
+    reservoir = Reservoir(10, 1, np.random.default_rng(0))
+    stream(reservoir, 7, 3)
+    X, y = reservoir.sample()
+    assert y.tolist() == list(range(7)) and X[:, 0].tolist() == list(range(7))
+
+
+def test_reservoir_sample_is_uniform():
+    n, size, trials = 1000, 100, 2000
+    counts = np.zeros(n)
+    for seed in range(trials):
+        reservoir = Reservoir(size, 1, np.random.default_rng(seed))
+        stream(reservoir, n, 37)
+        X, y = reservoir.sample()
+        assert len(np.unique(y)) == size and np.array_equal(X[:, 0], y)
+        counts[y] += 1
+
+    expected = trials * size / n
+    sd = np.sqrt(trials * (size / n) * (1 - size / n))
+    assert np.abs(counts - expected).max() < 5 * sd
+    # Neither the fill phase nor the end of the stream is favoured
+    for block in np.split(counts, 10):
+        assert abs(block.mean() - expected) < 5 * sd / np.sqrt(len(block))
+
+
+def test_merge_forests_rejects_different_classes():
+    X = np.arange(12, dtype=float).reshape(-1, 1)
+    a = RandomForestClassifier(n_estimators=2, random_state=0).fit(X, [0, 1] * 6)
+    b = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, [0, 1, 2] * 4)
+    with pytest.raises(ValueError):
+        merge_forests([a, b])
+    c = RandomForestClassifier(n_estimators=3, random_state=1).fit(X, [1, 0] * 6)
+    assert merge_forests([a, c]).n_estimators == 5
+
+
+@pytest.fixture
+def training_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 3))
+    y = (X[:, 0] > 0).astype(int) + 2 * (X[:, 1] > 1)
+    y[:3] = 7  # a rare class that only appears in the first chunk
+    path = tmp_path / "train.csv"
+    pd.DataFrame(X, columns=["a", "b", "c"]).assign(target=y).to_csv(path, index=False)
+    return str(path), X, y
+
+
+def test_train_out_of_core_is_deterministic_and_sees_every_class(training_csv):
+    path, X, y = training_csv
+
+    def train():
+        return train_out_of_core(path, chunk_size=100, n_subsets=3, trees_per_subset=5,
+                                 n_jobs=1, log=lambda message: None)
+
+    pipeline = train()
+    forest = pipeline[-1]
+    assert forest.n_estimators == len(forest.estimators_) == 15
+    assert forest.classes_.tolist() == sorted(set(y))
+    np.testing.assert_allclose(pipeline[0].mean_, X.mean(axis=0))
+
+    frame = pd.DataFrame(X, columns=["a", "b", "c"])
+    assert pipeline.score(frame, y) > 0.8
+    np.testing.assert_array_equal(pipeline.predict_proba(frame), train().predict_proba(frame))
@@ -0,0 +1,164 @@
+"""Single training entry point shared by ``app.py`` and ``train_and_save_model.py``.
+
+Fits the ``StandardScaler`` + 200-tree ``RandomForestClassifier`` pipeline with
+the trees built in parallel on all cores. The forest draws every tree's seed
+from ``random_state`` before dispatching work, so the fitted model is identical
+for any ``n_jobs``; trees are built by threads (scikit-learn's tree builder
+releases the GIL), so all workers read the one training matrix in place
+rather than receiving per-process copies. Each phase (load, scale, fit,
+evaluate, save) is timed, logged and recorded in ``metrics``.
+
+Usage::
+
+    python training.py                       # train + evaluate + save model_pipeline.pkl
+    python training.py --n-jobs 4 --zoo      # 4 cores, then also train the model zoo
+    python training.py --data big.csv --out-of-core --chunk-size 100000
+"""
+import argparse
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from joblib import effective_n_jobs
+from sklearn.metrics import accuracy_score, classification_report
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+import metrics
+from model_zoo import build_pipeline, save_artifact, serving_path
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAIN_DATA_PATH = os.path.join(BASE_DIR, "train_data.csv")
+MODEL_PATH = os.path.join(BASE_DIR, "model_pipeline.pkl")
+
+logger = logging.getLogger("training")
+
+
+@contextmanager
+def timed(phase, timings, **labels):
+    """Time a training phase, log it and record it as a metric."""
+    start = time.perf_counter()
+    yield
+    timings[phase] = elapsed = time.perf_counter() - start
+    logger.info("%-8s %.3fs", phase, elapsed)
+    metrics.record("training_phase_seconds", elapsed, phase=phase, **labels)
+
+
+def load_training_data(path=TRAIN_DATA_PATH, target="target"):
+    """Return the 80% training and 20% held-out splits of ``path``."""
+    data = pd.read_csv(path)
+    X = data.drop(target, axis=1)
+    y = data[target]
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def fit_pipeline(X_train, y_train, n_jobs=-1, timings=None, labels=None):
+    """Fit the scaler + forest pipeline, timing scaling and fitting separately."""
+    timings = {} if timings is None else timings
+    labels = labels or {}
+    pipeline = build_pipeline("random_forest")
+    scaler, clf = pipeline.named_steps["scaler"], pipeline.named_steps["clf"]
+    clf.set_params(n_jobs=n_jobs)
+    with timed("scale", timings, **labels):
+        X_scaled = scaler.fit_transform(X_train)
+    with timed("fit", timings, **labels):
+        clf.fit(X_scaled, y_train)
+    # Serve single predictions without spinning up a thread pool
+    clf.set_params(n_jobs=None)
+    return Pipeline([("scaler", scaler), ("clf", clf)])
+
+
+def train_and_save_model(data_path=TRAIN_DATA_PATH, model_path=MODEL_PATH, n_jobs=-1):
+    """Train, evaluate on the held-out split and save the pipeline.
+
+    Returns ``(pipeline, report)`` where ``report`` holds the accuracy, the
+    classification report and the per-phase timings.
+    """
+    timings = {}
+    labels = {"n_jobs": n_jobs, "cores": effective_n_jobs(n_jobs)}
+    with timed("load", timings, **labels):
+        X_train, X_test, y_train, y_test = load_training_data(data_path)
+    labels["rows"] = len(X_train)
+    pipeline = fit_pipeline(X_train, y_train, n_jobs, timings, labels)
+    with timed("evaluate", timings, **labels):
+        y_pred = pipeline.predict(X_test)
+    with timed("save", timings, **labels):
+        save_artifact(pipeline, model_path, mode="in_memory", rows=labels["rows"])
+    report = {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "classification_report": classification_report(y_test, y_pred),
+        "timings": timings,
+    }
+    return pipeline, report
+
+
+def report_serving(output, log=print):
+    """Say whether the app will serve the model just written to ``output``.
+
+    ``model_pipeline.pkl`` trained after the zoo is served instead of the zoo's
+    choice; any other path is never served.
+    """
+    served = serving_path()
+    if served is not None and os.path.samefile(served, output):
+        log(f"The app will serve {output}")
+    else:
+        log(f"Warning: the app serves {served or 'nothing'}, not {output};"
+            f" write to {MODEL_PATH} to serve this model")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the career prediction model.")
+    parser.add_argument("--data", default=TRAIN_DATA_PATH, help="training CSV with a target column")
+    parser.add_argument("--output", default=MODEL_PATH, help="where to write the pipeline pickle")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores for tree building (-1 = all)")
+    parser.add_argument("--zoo", action="store_true", help="also train and benchmark the model zoo")
+    parser.add_argument("--out-of-core", action="store_true", help="stream --data in chunks instead of loading it")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per chunk (out-of-core)")
+    args = parser.parse_args(argv)
+    if args.out_of_core and args.zoo:
+        parser.error("--zoo loads the training data into memory; it cannot be combined with --out-of-core")
+    if args.chunk_size is not None and not args.out_of_core:
+        parser.error("--chunk-size only applies with --out-of-core")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.out_of_core:
+        from model_zoo import load_test_data
+        from out_of_core import OOC_CHUNK_SIZE, train_out_of_core
+
+        timings = {}
+        labels = {"mode": "out_of_core", "n_jobs": args.n_jobs, "cores": effective_n_jobs(args.n_jobs)}
+        with timed("fit", timings, **labels):
+            pipeline = train_out_of_core(
+                args.data, args.chunk_size or OOC_CHUNK_SIZE, n_jobs=args.n_jobs, log=logger.info,
+            )
+        with timed("evaluate", timings, **labels):
+            X_test, y_test = load_test_data()
+            print(f"Test accuracy: {pipeline.score(X_test, y_test):.4f}")
+        with timed("save", timings, **labels):
+            save_artifact(pipeline, args.output, mode="out_of_core")
+        print(f"Saved pipeline to {args.output}")
+        report_serving(args.output)
+        return pipeline
+
+    print("Training pipeline...")
+    pipeline, report = train_and_save_model(args.data, args.output, args.n_jobs)
+    print(f"Test accuracy: {report['accuracy']:.4f}")
+    print("Classification report:")
+    print(report["classification_report"])
+    print(f"Saved pipeline to {args.output}")
+
+    if args.zoo:
+        from model_zoo import format_manifest, train_model_zoo
+
+        print("Training model zoo...")
+        X_train, _, y_train, _ = load_training_data(args.data)
+        manifest = train_model_zoo(X_train, y_train)
+        print(format_manifest(manifest))
+        print("Saved model zoo to models/")
+    return pipeline
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Background warm-up of the prediction and rendering path.
+
+Replays common profiles (the predictor form defaults, optional profiles from
+``WARMUP_PROFILES_PATH`` and a sample of recent audit-log inputs) through
+``predict_proba`` and the Plotly figure serialisation used on the results page,
+so the first real users do not pay for cold caches and lazy initialisation.
+Warm-up time and the first-request latency (labelled with whether warm-up had
+finished) are recorded via ``metrics``.
+"""
+import json
+import os
+import threading
+import time
+
+import metrics
+from charts import build_result_figures
+from prediction import (
+    SUBJECT_COLUMNS, build_features, predict_proba_cached, rank_careers, recent_audit_profiles,
+)
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1") != "0"
+WARMUP_PROFILES_PATH = os.environ.get("WARMUP_PROFILES_PATH", "")
+WARMUP_AUDIT_SAMPLE = int(os.environ.get("WARMUP_AUDIT_SAMPLE", "20"))
+
+# Matches the slider / selectbox defaults of ``predict_form`` in app.py
+DEFAULT_PROFILES = [
+    {
+        "gender": "Male", "part_time": "No", "absence": 3, "extracurricular": "No",
+        "weekly_study": 10, "scores": [75, 70, 80, 78, 72, 82, 68],
+    },
+]
+
+_lock = threading.Lock()
+_started = False
+_done = threading.Event()
+_first_request_recorded = False
+
+
+def load_profiles(path=WARMUP_PROFILES_PATH, audit_sample=WARMUP_AUDIT_SAMPLE):
+    """Return warm-up feature rows: defaults, configured profiles, audit sample."""
+    form_profiles = list(DEFAULT_PROFILES)
+    if path and os.path.exists(path):
+        with open(path) as f:
+            form_profiles.extend(json.load(f))
+    profiles = [build_features(**p) for p in form_profiles]
+    return profiles + recent_audit_profiles(audit_sample)
+
+
+def run_warmup(model, class_names, career_meta, profiles=None):
+    """Predict and render every profile once; return elapsed seconds."""
+    start = time.perf_counter()
+    profiles = load_profiles() if profiles is None else profiles
+    for feat_df in profiles:
+        probs = predict_proba_cached(model, feat_df)
+        df_results = rank_careers(probs, class_names)
+        scores = [int(feat_df.iloc[0][c]) for c in SUBJECT_COLUMNS]
+        for fig in build_result_figures(df_results, scores, career_meta):
+            fig.to_json()
+    elapsed = time.perf_counter() - start
+    metrics.record("warmup_seconds", elapsed, profiles=len(profiles))
+    return elapsed
+
+
+def _warmup_worker(load_model, class_names, career_meta):
+    try:
+        model = load_model()
+        if model is not None:
+            run_warmup(model, class_names, career_meta)
+    except Exception as exc:  # warm-up is best effort; serving must not fail
+        metrics.record("warmup_failed", 1, error=repr(exc))
+    finally:
+        _done.set()
+
+
+def start_warmup(load_model, class_names, career_meta):
+    """Start the warm-up thread once per process (no-op if disabled)."""
+    global _started
+    with _lock:
+        if _started or not WARMUP_ENABLED:
+            return
+        _started = True
+    threading.Thread(
+        target=_warmup_worker,
+        args=(load_model, class_names, career_meta),
+        name="model-warmup",
+        daemon=True,
+    ).start()
+
+
+def is_warm():
+    return _done.is_set()
+
+
+def record_first_request(latency_ms):
+    """Record the latency of the first prediction served by this process."""
+    global _first_request_recorded
+    with _lock:
+        if _first_request_recorded:
+            return
+        _first_request_recorded = True
+    metrics.record(
+        "first_request_latency_ms", latency_ms,
+        warmup_enabled=WARMUP_ENABLED, warmed=is_warm(),
+    )